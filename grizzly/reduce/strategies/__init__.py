@@ -10,12 +10,20 @@ for cleaning up all testcases that are yielded.
 Constants:
     DEFAULT_STRATEGIES (list(str)): List of strategy names run by default if none are
                                     specified.
+    HASH_POOL_MIN_SIZE (int): Minimum total size (bytes) of testcase files before
+                              they are hashed using a thread pool.
+    HASH_WORKERS (int): Maximum number of threads used to hash testcase files.
     STRATEGIES (dict{str: Strategy}): Mapping of available strategy names to
                                       implementing class.
 """
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from hashlib import sha512
 from logging import DEBUG, getLogger
+from mmap import ACCESS_READ, mmap
+from os import cpu_count, fstat, scandir
+from os.path import relpath
 from pathlib import Path
 from shutil import rmtree
 from tempfile import mkdtemp
@@ -27,6 +35,8 @@ from ...common.utils import grz_tmp
 
 LOG = getLogger(__name__)
 
+HASH_POOL_MIN_SIZE = 0x400000  # 4MB
+HASH_WORKERS = min(8, cpu_count() or 1)
 
 DEFAULT_STRATEGIES = (
     "list",
@@ -66,8 +76,46 @@ def _load_strategies():
 
 
 def _contains_dd(path):
-    data = path.read_bytes()
-    return b"DDBEGIN" in data and b"DDEND" in data
+    with open(path, "rb") as in_fp:
+        # empty files cannot be mapped
+        if not fstat(in_fp.fileno()).st_size:
+            return False
+        with mmap(in_fp.fileno(), 0, access=ACCESS_READ) as data:
+            return data.find(b"DDBEGIN") != -1 and data.find(b"DDEND") != -1
+
+
+def _hash_file(path):
+    """Calculate the SHA-512 digest of a file.
+
+    Arguments:
+        path (str): File to hash.
+
+    Returns:
+        bytes: SHA-512 digest of the file contents.
+    """
+    tf_hash = sha512()
+    with open(path, "rb") as in_fp:
+        # hashlib releases the GIL while hashing so this can run in a thread pool
+        for chunk in iter(partial(in_fp.read, 0x100000), b""):  # 1MB chunks
+            tf_hash.update(chunk)
+    return tf_hash.digest()
+
+
+def _scan_files(path):
+    """Recursively scan a directory for files.
+
+    Arguments:
+        path (Path or str): Directory to scan.
+
+    Yields:
+        os.DirEntry: Each file found.
+    """
+    with scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from _scan_files(entry.path)
+            elif entry.is_file():
+                yield entry
 
 
 class Strategy(ABC):
@@ -94,6 +142,32 @@ class Strategy(ABC):
         self._testcase_root = Path(mkdtemp(prefix="tc_", dir=grz_tmp("reduce")))
         self.dump_testcases(testcases)
 
+    def _hash_files(self, exclude=None):
+        """Calculate hashes of files in testcase root.
+
+        Arguments:
+            exclude (str): File to skip (relative to testcase root).
+
+        Returns:
+            dict(str, str): Mapping of str(Path) to SHA-512 of each file in testcase
+                            root.
+        """
+        files = {
+            relpath(entry.path, self._testcase_root): entry
+            for entry in _scan_files(self._testcase_root)
+        }
+        files.pop(exclude, None)
+        paths = [entry.path for entry in files.values()]
+        # starting a thread pool costs more than hashing a few small files
+        if (
+            len(files) > 1
+            and sum(entry.stat().st_size for entry in files.values())
+            >= HASH_POOL_MIN_SIZE
+        ):
+            with ThreadPoolExecutor(min(HASH_WORKERS, len(files))) as executor:
+                return dict(zip(files, executor.map(_hash_file, paths)))
+        return dict(zip(files, map(_hash_file, paths)))
+
     def _calculate_testcase_hash(self):
         """Calculate hashes of all files in testcase root.
 
@@ -101,28 +175,31 @@ class Strategy(ABC):
             tuple(tuple(str, str)): A tuple of 2-tuples mapping str(Path) to SHA-512 of
                                     each file in testcase root.
         """
-        result = []
-        for path in self._testcase_root.glob("**/*"):
-            if path.is_file():
-                tf_hash = sha512()
-                tf_hash.update(path.read_bytes())
-                result.append(
-                    (str(path.relative_to(self._testcase_root)), tf_hash.digest())
-                )
-        result = tuple(sorted(result))
+        result = tuple(sorted(self._hash_files().items()))
+        self._log_testcase_hash(result)
+        return result
 
+    def _log_testcase_hash(self, tc_hash):
+        """Log a digest of a testcase root hash and whether it is in the tried cache.
+        This is a no-op unless debug logging is enabled.
+
+        Arguments:
+            tc_hash (tuple(tuple(str, str))): Testcase root hash as returned by
+                                              `_calculate_testcase_hash()`.
+
+        Returns:
+            None
+        """
         if LOG.getEffectiveLevel() == DEBUG:
             print_hash = sha512()
-            print_hash.update(repr(result).encode("utf-8", errors="surrogateescape"))
-            in_tried = result in self._tried
+            print_hash.update(repr(tc_hash).encode("utf-8", errors="surrogateescape"))
+            in_tried = tc_hash in self._tried
             LOG.debug(
                 "Testcase hash: %s (%sin cache)",
                 print_hash.hexdigest()[:32],
                 "" if in_tried else "not ",
             )
 
-        return result
-
     def update_tried(self, tried):
         """Update the list of tried testcase/hash sets. Testcases are hashed with
         SHA-512 and digested to bytes (`hashlib.sha512(testcase).digest()`)
@@ -233,6 +310,31 @@ class Strategy(ABC):
         """
         rmtree(str(self._testcase_root))
 
+    @staticmethod
+    def all_served(testcases, served):
+        """Check whether everything in the testcase list was served, in which case
+        `purge_unserved` would have nothing to purge.
+
+        Only testcase metadata is accessed, so the testcases can be ones that have
+        already been yielded to the caller.
+
+        Arguments:
+            testcases (list(grizzly.common.storage.TestCase): testcases last replayed
+            served (list(list(str))): list of files served for each testcase.
+
+        Returns:
+            bool: True if all testcases and files were served
+        """
+        if len(served) < len(testcases):
+            return False
+        for testcase, tc_served in zip(testcases, served):
+            if testcase.landing_page not in tc_served:
+                return False
+            for opt in testcase.optional:
+                if not any(x.endswith(opt) for x in tc_served):
+                    return False
+        return True
+
     def purge_unserved(self, testcases, served):
         """Given the testcase list yielded and list of what was served, purge
         everything in testcase root to hold only what was served.
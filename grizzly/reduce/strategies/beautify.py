@@ -10,6 +10,8 @@ Constants:
 import re
 from abc import ABC, abstractmethod
 from logging import getLogger
+from os.path import splitext
+from pathlib import Path
 
 from lithium.testcases import TestcaseLine
 
@@ -28,7 +30,7 @@ except ImportError:  # pragma: no cover
     HAVE_JSBEAUTIFIER = False
 
 from ...common.storage import TestCase
-from . import Strategy, _contains_dd
+from . import Strategy, _contains_dd, _scan_files
 
 LOG = getLogger(__name__)
 
@@ -80,14 +82,13 @@ class _BeautifyStrategy(Strategy, ABC):
         """
         super().__init__(testcases)
         self._files_to_beautify = []
-        for path in self._testcase_root.glob("**/*"):
+        for entry in _scan_files(self._testcase_root):
             if (
-                path.is_file()
-                and path.suffix in self.all_extensions
-                and path.name not in self.ignore_files
+                splitext(entry.name)[1] in self.all_extensions
+                and entry.name not in self.ignore_files
             ):
-                if _contains_dd(path):
-                    self._files_to_beautify.append(path)
+                if _contains_dd(entry.path):
+                    self._files_to_beautify.append(Path(entry.path))
         self._current_feedback = None
         tag_bytes = self.tag_name.encode("ascii")
         self._re_tag_start = re.compile(
@@ -4,7 +4,10 @@
 """Grizzly reducer lithium strategy definitions."""
 
 from abc import ABC
+from collections import deque
+from hashlib import sha512
 from logging import getLogger
+from pathlib import Path
 
 from lithium.strategies import CheckOnly
 from lithium.strategies import CollapseEmptyBraces as LithCollapseEmptyBraces
@@ -14,11 +17,41 @@ from lithium.testcases import Testcase as LithTestcase
 from lithium.testcases import TestcaseAttrs, TestcaseChar, TestcaseJsStr, TestcaseLine
 
 from ...common.storage import TestCase
-from . import Strategy, _contains_dd
+from . import Strategy, _contains_dd, _scan_files
 
 LOG = getLogger(__name__)
 
 
+def _hash_entries(entries):
+    """Calculate an order independent digest of testcase root hash entries.
+
+    Arguments:
+        entries (iterable(tuple(str, str))): str(Path) and SHA-512 pairs.
+
+    Returns:
+        int: Digest of all entries.
+    """
+    result = 0
+    for entry in entries:
+        result ^= hash(entry)
+    return result
+
+
+def _dump_lith_testcase(testcase, path=None):
+    """Write a Lithium testcase to the filesystem and return the data written, so it
+    can be hashed without reading it back from disk.
+
+    Arguments:
+        testcase (lithium.testcases.Testcase): Testcase to write.
+        path (Path or str): Output path (default: testcase.filename).
+
+    Returns:
+        bytes: Data written.
+    """
+    testcase.dump(path)
+    return b"".join((testcase.before, *testcase.parts, testcase.after))
+
+
 class _LithiumStrategy(Strategy, ABC):
     """Use a Lithium `Strategy`/`Testcase` pair to reduce the given Grizzly `TestCase`
     set.
@@ -45,6 +78,13 @@ class _LithiumStrategy(Strategy, ABC):
         super().__init__(testcases)
         self._current_reducer = None
         self._files_to_reduce = []
+        # set of self._files_to_reduce for membership tests
+        self._files_to_reduce_set = set()
+        # hashes of all files in testcase root except the file currently being reduced
+        self._sibling_hash_map = None
+        # index of self._tried used to populate the lithium strategy "tried" cache
+        # (str(Path), _hash_entries(all other files)) -> list(self._tried entries)
+        self._tried_index = {}
         self.rescan_files_to_reduce()
         self._current_feedback = None
         self._current_served = None
@@ -57,10 +97,86 @@ class _LithiumStrategy(Strategy, ABC):
             None
         """
         self._files_to_reduce.clear()
-        for path in self._testcase_root.glob("**/*"):
-            if path.is_file() and path.name not in {"test_info.json", "prefs.js"}:
-                if _contains_dd(path):
+        self._files_to_reduce_set.clear()
+        # files may have been purged, sibling hashes must be recalculated
+        self._sibling_hash_map = None
+        for entry in _scan_files(self._testcase_root):
+            if entry.name not in {"test_info.json", "prefs.js"}:
+                if _contains_dd(entry.path):
+                    path = Path(entry.path)
                     self._files_to_reduce.append(path)
+                    self._files_to_reduce_set.add(path)
+
+    def _calculate_reduction_hash(self, file_rel, data):
+        """Calculate the testcase root hash for a reduction of `file_rel`, without
+        reading the testcase root from disk. `self._sibling_hash_map` must be up to
+        date.
+
+        Arguments:
+            file_rel (str): File being reduced (relative to testcase root).
+            data (bytes): Contents of the reduction of `file_rel`.
+
+        Returns:
+            tuple(tuple(str, str)): Same as `_calculate_testcase_hash()` would return
+                                    if `data` was written to `file_rel`.
+        """
+        result = set(self._sibling_hash_map.items())
+        result.add((file_rel, sha512(data).digest()))
+        result = tuple(sorted(result))
+        self._log_testcase_hash(result)
+        return result
+
+    def _index_tried(self, tried):
+        """Add a testcase root hash to the tried index. Each file is keyed by a digest
+        of the other files' hashes, so keys have a constant size regardless of the
+        number of files. Collisions are resolved by `_lookup_tried()`.
+
+        Arguments:
+            tried (tuple(tuple(str, str))): Tried testcase root hash.
+
+        Returns:
+            None
+        """
+        digest = _hash_entries(tried)
+        for entry in tried:
+            key = (entry[0], digest ^ hash(entry))
+            self._tried_index.setdefault(key, []).append(tried)
+
+    def _lookup_tried(self, file_rel):
+        """Find tried hashes of `file_rel` where all other files match the current
+        testcase root state. `self._sibling_hash_map` must be up to date.
+
+        Arguments:
+            file_rel (str): File being reduced (relative to testcase root).
+
+        Returns:
+            set(str): SHA-512 hex digests of tried contents of `file_rel`.
+        """
+        result = set()
+        key = (file_rel, _hash_entries(self._sibling_hash_map.items()))
+        for tried in self._tried_index.get(key, ()):
+            tried = dict(tried)
+            tc_tried = tried.pop(file_rel)
+            if tried == self._sibling_hash_map:
+                # lithium compares hashes as hex strings
+                result.add(tc_tried.hex())
+        return result
+
+    def update_tried(self, tried):
+        """Update the list of tried testcase/hash sets. Testcases are hashed with
+        SHA-512 and digested to bytes (`hashlib.sha512(testcase).digest()`)
+
+        Arguments:
+            tried (iterable(tuple(tuple(str, str)))): Set of already tried testcase
+                                                      hashes.
+
+        Returns:
+            None
+        """
+        new_tried = frozenset(tried) - self._tried
+        super().update_tried(new_tried)
+        for tc_hash in new_tried:
+            self._index_tried(tc_hash)
 
     @classmethod
     def sanity_check_cls_attrs(cls):
@@ -105,19 +221,20 @@ class _LithiumStrategy(Strategy, ABC):
         """
         LOG.info("Reducing %d files", len(self._files_to_reduce))
         file_no = 0
-        reduce_queue = self._files_to_reduce.copy()
-        reduce_queue.sort()  # not necessary, but helps make tests more predictable
+        # sorting is not necessary, but helps make tests more predictable
+        reduce_queue = deque(sorted(self._files_to_reduce))
         # indicates that self._testcase_root contains changes that haven't been yielded
         # (if iteration ends, changes would be lost)
         testcase_root_dirty = False
         while reduce_queue:
             LOG.debug("Reduce queue: %r", reduce_queue)
-            file = reduce_queue.pop(0)
+            file = reduce_queue.popleft()
+            file_rel = str(file.relative_to(self._testcase_root))
             file_no += 1
             LOG.info(
                 "[%s] Reducing %s (file %d/%d)",
                 self.name,
-                file.relative_to(self._testcase_root),
+                file_rel,
                 file_no,
                 len(self._files_to_reduce),
             )
@@ -128,27 +245,33 @@ class _LithiumStrategy(Strategy, ABC):
 
             # populate the lithium strategy "tried" cache
             # use all cache values where all hashes other than the current file match
-            # the current testcase_root state.
-            current_tc_hash_map = dict(self._calculate_testcase_hash())
-            del current_tc_hash_map[str(file.relative_to(self._testcase_root))]
-            this_tc_tried = set()
-            for tried in self._tried:
-                tried = dict(tried)
-                tc_tried = tried.pop(str(file.relative_to(self._testcase_root)))
-                if tried == current_tc_hash_map:
-                    this_tc_tried.add(tc_tried)
-            self._current_reducer.update_tried(this_tc_tried)
+            # the current testcase_root state (the current file was just loaded by
+            # lithium and doesn't need to be read and hashed again).
+            self._sibling_hash_map = self._hash_files(exclude=file_rel)
+            self._current_reducer.update_tried(self._lookup_tried(file_rel))
 
             for reduction in self._current_reducer:
-                reduction.dump()
+                reduction_data = _dump_lith_testcase(reduction)
                 testcases = TestCase.load(self._testcase_root, True)
                 LOG.info("[%s] %s", self.name, self._current_reducer.description)
                 yield testcases
                 if self._current_feedback:
                     testcase_root_dirty = False
                 else:
-                    self._tried.add(self._calculate_testcase_hash())
-                if self._current_feedback and self._current_served is not None:
+                    if self._sibling_hash_map is None:
+                        # testcase root was rescanned since the last hash
+                        self._sibling_hash_map = self._hash_files(exclude=file_rel)
+                    tc_hash = self._calculate_reduction_hash(file_rel, reduction_data)
+                    if tc_hash not in self._tried:
+                        self._tried.add(tc_hash)
+                        self._index_tried(tc_hash)
+                if (
+                    self._current_feedback
+                    and self._current_served is not None
+                    and not self.all_served(testcases, self._current_served)
+                ):
+                    # the testcases yielded are owned by the caller,
+                    # load a new copy to purge
                     testcases = TestCase.load(self._testcase_root, True)
                     try:
                         self.purge_unserved(testcases, self._current_served)
@@ -159,15 +282,20 @@ class _LithiumStrategy(Strategy, ABC):
                     LOG.debug("files being reduced before: %r", self._files_to_reduce)
                     self.rescan_files_to_reduce()
                     LOG.debug("files being reduced after: %r", self._files_to_reduce)
-                    files_to_reduce = set(self._files_to_reduce)
-                    reduce_queue = sorted(set(reduce_queue) & files_to_reduce)
+                    # files are only ever removed by purging, so filtering keeps the
+                    # queue sorted
+                    reduce_queue = deque(
+                        path
+                        for path in reduce_queue
+                        if path in self._files_to_reduce_set
+                    )
                     testcase_root_dirty = len(self._files_to_reduce) != num_files_before
-                    if file not in files_to_reduce:
+                    if file not in self._files_to_reduce_set:
                         # current reduction was for a purged file
                         break
             else:
                 # write out the best found testcase
-                self._current_reducer.testcase.dump()
+                _dump_lith_testcase(self._current_reducer.testcase)
             self._current_reducer = None
         if testcase_root_dirty:
             # purging unserved files enabled us to exit early from the loop.
@@ -195,6 +323,7 @@ class Check(_LithiumStrategy):
         # trim files_to_reduce, for check we don't need to run on every file
         # just once per Grizzly TestCase set is enough.
         self._files_to_reduce = self._files_to_reduce[:1]
+        self._files_to_reduce_set = set(self._files_to_reduce)
 
     def __iter__(self):
         yield from super().__iter__()
@@ -476,13 +476,12 @@ ReproTestParams = namedtuple(
             detect_failure=bool,
             interesting_str="%r != ''",
             is_expected=lambda contents: contents == "1\n2\n3\n",
-            expected_run_calls=16,
+            expected_run_calls=12,
             n_reports=1,
             reports={"1\n2\n3\n"},
             n_other=2,
-            other_reports={
-                "1\n",
-            },
+            # "1\n" is already in the tried cache when running "chars"
+            other_reports={"1\n", "1\n2\n3"},
             result=0,
         ),
         # reproduces, one strategy, testcase reduces to 0
@@ -502,19 +501,33 @@ ReproTestParams = namedtuple(
         # reproduces, two strategies, 1st no reduce, 2nd testcase reduces to 0
         ReproTestParams(
             original=b"1\n2\n3\n",
-            strategies=["check", "lines", "lines"],
+            strategies=["check", "lines", "chars"],
             detect_failure=_ignore_arg(
-                partial([True, False, False, False, False, False, True, True].pop, 0)
+                partial(([True] + [False] * 5 + [True] * 6).pop, 0)
             ),
             interesting_str="%r is anything, only in second strategy",
             is_expected=lambda _: True,
-            expected_run_calls=8,
+            expected_run_calls=12,
             n_reports=2,
             reports={"1\n2\n3\n", ""},
             n_other=0,
             other_reports=None,
             result=0,
         ),
+        # reproduces, same strategy twice, 2nd only repeats tried reductions (cached)
+        ReproTestParams(
+            original=b"1\n2\n3\n",
+            strategies=["check", "lines", "lines"],
+            detect_failure=_ignore_arg(partial(([True] + [False] * 5).pop, 0)),
+            interesting_str="%r is anything, only in check",
+            is_expected=lambda _: True,
+            expected_run_calls=6,
+            n_reports=1,
+            reports={"1\n2\n3\n"},
+            n_other=0,
+            other_reports=None,
+            result=0,
+        ),
     ],
 )
 @mark.usefixtures("reporter_sequential_strftime")
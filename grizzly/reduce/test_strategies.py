@@ -3,9 +3,15 @@
 # file, You can obtain one at http://mozilla.org/MPL/2.0/.
 # pylint: disable=protected-access
 """Unit tests for `grizzly.reduce.strategies`."""
+
 from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from hashlib import sha512
 from logging import getLogger
+from pathlib import Path
 
+from lithium.testcases import TestcaseLine
 from pytest import mark, raises
 
 from sapphire import Sapphire
@@ -15,7 +21,8 @@ from ..common.storage import TestCase
 from ..replay import ReplayResult
 from ..target import AssetManager, Target
 from . import ReduceManager
-from .strategies import Strategy, _load_strategies
+from .strategies import Strategy, _contains_dd, _load_strategies
+from .strategies.lithium import MinimizeLines, _dump_lith_testcase
 
 LOG = getLogger(__name__)
 pytestmark = mark.usefixtures(
@@ -392,6 +399,54 @@ def test_purge_unserved(
     ), list((log_path / "reports").iterdir())
 
 
+@mark.parametrize(
+    "served, result",
+    [
+        # everything served
+        ([["test.html", "opt.html"], ["test.html"]], True),
+        # landing page must match exactly
+        ([["/a/test.html", "/a/opt.html"], ["test.html"]], False),
+        # optional files can be absolute
+        ([["test.html", "/a/opt.html"], ["test.html"]], True),
+        # optional file not served
+        ([["test.html"], ["test.html"]], False),
+        # landing page not served
+        ([["opt.html"], ["test.html"]], False),
+        # second testcase not served
+        ([["test.html", "opt.html"]], False),
+    ],
+)
+def test_all_served(served, result):
+    """test detecting whether anything would be purged by purge_unserved"""
+    tests = []
+    try:
+        for data in ({"test.html": b"1", "opt.html": b"2"}, {"test.html": b"3"}):
+            test = TestCase("test.html", None, "test-adapter")
+            for name, content in data.items():
+                test.add_from_bytes(content, name)
+            tests.append(test)
+        assert Strategy.all_served(tests, served) == result
+    finally:
+        for test in tests:
+            test.cleanup()
+
+
+@mark.parametrize(
+    "data, result",
+    [
+        (b"", False),
+        (b"123\n", False),
+        (b"DDBEGIN\n123\n", False),
+        (b"123\nDDEND\n", False),
+        (b"DDBEGIN\n123\nDDEND\n", True),
+    ],
+)
+def test_contains_dd(tmp_path, data, result):
+    """test that files containing DDBEGIN/END are detected"""
+    (tmp_path / "test.html").write_bytes(data)
+    assert _contains_dd(tmp_path / "test.html") == result
+
+
 def test_dd_only(mocker, tmp_path):
     """test that only files containing DDBEGIN/END are reduced"""
     replayer = mocker.patch("grizzly.reduce.core.ReplayManager", autospec=True)
@@ -450,3 +505,102 @@ def test_dd_only(mocker, tmp_path):
     ), list((log_path / "reports").iterdir())
     others = {test.read_text() for test in log_path.glob("reports/*-*/other.html")}
     assert others == {"blah\n"}
+
+
+@contextmanager
+def _minimize_lines(files):
+    """Create a MinimizeLines strategy from a single testcase.
+
+    Arguments:
+        files (dict(str, bytes)): Testcase contents. The first file is the entry point.
+
+    Yields:
+        MinimizeLines: Strategy with the testcase root loaded.
+    """
+    with TestCase(next(iter(files)), None, "test-adapter", timestamp=1) as test:
+        for name, data in files.items():
+            test.add_from_bytes(data, name)
+        strategy = MinimizeLines([test])
+    with strategy:
+        yield strategy
+
+
+def test_lithium_reduction_hash(caplog):
+    """test that reduction hashes match the hash of the dumped testcase root"""
+    with _minimize_lines(
+        {"test.html": b"DDBEGIN\n123\nrequired\nDDEND\n", "other.html": b"blah\n"}
+    ) as strategy:
+        file_rel = str(Path("000") / "test.html")
+        strategy._sibling_hash_map = strategy._hash_files(exclude=file_rel)
+        assert len(strategy._sibling_hash_map) == 2
+        reduction = TestcaseLine()
+        reduction.load(strategy._testcase_root / file_rel)
+        reduction.rmslice(0, 1)
+        before = strategy._calculate_testcase_hash()
+        data = _dump_lith_testcase(reduction)
+        assert data == b"DDBEGIN\nrequired\nDDEND\n"
+        caplog.clear()
+        tc_hash = strategy._calculate_reduction_hash(file_rel, data)
+        assert "Testcase hash: " in caplog.text
+        assert tc_hash != before
+        assert tc_hash == strategy._calculate_testcase_hash()
+
+
+def test_lithium_tried_cache():
+    """test that reductions in the tried cache are not attempted again"""
+    with _minimize_lines(
+        {"test.html": b"DDBEGIN\n1\nDDEND\n", "other.html": b"blah\n"}
+    ) as strategy:
+        tried = strategy._calculate_testcase_hash()
+    attempts = []
+    with _minimize_lines(
+        {"test.html": b"DDBEGIN\n1\n2\nDDEND\n", "other.html": b"blah\n"}
+    ) as strategy:
+        strategy.update_tried({tried})
+        for reduction in strategy:
+            attempts.append(reduction[0].get_file("test.html").data_file.read_text())
+            for test in reduction:
+                test.cleanup()
+            strategy.update(False)
+    assert attempts == ["DDBEGIN\n2\nDDEND\n"]
+
+
+def test_lithium_tried_index():
+    """test that the tried index only matches entries where all other files match"""
+    with _minimize_lines({"test.html": b"DDBEGIN\n1\nDDEND\n"}) as strategy:
+        strategy.update_tried(
+            {
+                (("a", b"\x01"), ("b", b"\x02"), ("c", b"\x03")),
+                (("a", b"\x04"), ("b", b"\x02"), ("c", b"\x05")),
+            }
+        )
+        # adding an existing entry again doesn't change lookup results
+        strategy.update_tried({(("a", b"\x01"), ("b", b"\x02"), ("c", b"\x03"))})
+        strategy._sibling_hash_map = {"b": b"\x02", "c": b"\x03"}
+        assert strategy._lookup_tried("a") == {"01"}
+        assert strategy._lookup_tried("b") == set()
+        strategy._sibling_hash_map = {"a": b"\x01", "b": b"\x02"}
+        assert strategy._lookup_tried("c") == {"03"}
+        strategy._sibling_hash_map = {"a": b"\x04", "b": b"\x02"}
+        assert strategy._lookup_tried("c") == {"05"}
+        strategy._sibling_hash_map = {"a": b"\x01", "b": b"\x06"}
+        assert strategy._lookup_tried("c") == set()
+
+
+@mark.parametrize("use_pool", [True, False])
+def test_hash_files(mocker, use_pool):
+    """test testcase root hashing with and without a thread pool"""
+    # the test data is much smaller than 0x1000 bytes
+    mocker.patch(
+        "grizzly.reduce.strategies.HASH_POOL_MIN_SIZE", new=0 if use_pool else 0x1000
+    )
+    pool = mocker.patch(
+        "grizzly.reduce.strategies.ThreadPoolExecutor", wraps=ThreadPoolExecutor
+    )
+    with _minimize_lines({"test.html": b"123", "other.html": b"456"}) as strategy:
+        hashes = strategy._hash_files(exclude=str(Path("000") / "test_info.json"))
+    assert hashes == {
+        str(Path("000") / "test.html"): sha512(b"123").digest(),
+        str(Path("000") / "other.html"): sha512(b"456").digest(),
+    }
+    assert pool.call_count == (1 if use_pool else 0)